@@ -2,7 +2,12 @@
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routes import auth, users, rebates, carbon, contractors, chat
+from routes import auth, users, rebates, carbon, contractors, chat, audits
+from services.conversation import conversations
+from services.ingestion import pipeline
+from services.catalog import catalog
+from services.retrieval import index as catalog_index
+from middleware.admission import AdmissionController, AdmissionMiddleware, RouteLimit
 
 # ----------------------------
 # Logging Configuration
@@ -25,12 +30,36 @@ app = FastAPI(
 @app.on_event("startup")
 async def startup_event():
     """Initializes services on application startup."""
+    # Serve rebates/contractors from the on-disk snapshot, then sync with Firestore;
+    # the chat retrieval index is rebuilt whenever the catalog changes
+    catalog.subscribe(catalog_index.rebuild)
+    catalog.start()
     # This will connect to Redis if the REDIS_URL is set in your environment
     await chat.init_redis()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flushes buffered writes before the process exits."""
+    await conversations.writer.stop()
+    await pipeline.stop()
+    catalog.stop()
+
 # ----------------------------
 # Middleware
 # ----------------------------
+# Per-router admission control: concurrent requests, queued requests, and max queue wait (s).
+# Chat requests wait on a full Gemini round trip, so they get a small share.
+admission = AdmissionController({
+    "/chat": RouteLimit(max_concurrent=8, max_queue=16, queue_timeout=2.0),
+    "/carbon": RouteLimit(max_concurrent=16, max_queue=32, queue_timeout=1.0),
+    "/users": RouteLimit(max_concurrent=16, max_queue=32, queue_timeout=1.0),
+    "/audits": RouteLimit(max_concurrent=16, max_queue=64, queue_timeout=1.0),
+    "/rebates": RouteLimit(max_concurrent=32, max_queue=64, queue_timeout=0.5),
+    "/contractors": RouteLimit(max_concurrent=32, max_queue=64, queue_timeout=0.5),
+})
+# Added before CORS so that CORS stays outermost and 503s still carry CORS headers
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # TIP: Replace '*' with specific domains in production
@@ -46,6 +75,7 @@ app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(rebates.router, prefix="/rebates", tags=["Rebates"])
 app.include_router(carbon.router, prefix="/carbon", tags=["Carbon"])
+app.include_router(audits.router, prefix="/audits", tags=["Audits"])
 app.include_router(contractors.router, prefix="/contractors", tags=["Contractors"])
 app.include_router(chat.router, prefix="/chat", tags=["Chat"]) 
 
@@ -59,3 +89,10 @@ async def root():
     """
     logger.info("Health check requested.")
     return {"message": "Veridian API is running"}
+
+@app.get("/admission", tags=["Health"])
+async def admission_stats():
+    """
+    Per-router admission counters, for tuning the limits above.
+    """
+    return admission.stats()
@@ -0,0 +1,158 @@
+# backend/middleware/admission.py
+import asyncio
+import json
+import logging
+import math
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger("admission")
+
+# Weight of the newest sample in the moving average of service time
+_EWMA_ALPHA = 0.2
+
+
+class Rejected(Exception):
+    """Raised when a request is shed instead of being admitted."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RouteLimit:
+    """
+    Concurrency limit for one group of routes: at most max_concurrent requests run,
+    at most max_queue wait, and none waits longer than queue_timeout seconds.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_deadline = 0
+        self.service_time = 0.0  # EWMA, seconds
+        self.max_wait = 0.0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._loop = loop
+        return self._semaphore
+
+    def _expected_wait(self) -> float:
+        """Rough time until a newly queued request would start running."""
+        return (self.waiting + 1) / self.max_concurrent * self.service_time
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._expected_wait()))
+
+    async def acquire(self):
+        semaphore = self._get_semaphore()
+        if not semaphore.locked():
+            await semaphore.acquire()
+        else:
+            if self.waiting >= self.max_queue:
+                self.rejected_queue_full += 1
+                raise Rejected("queue full", self._retry_after())
+            # Shed right away if the queue is already too long to make the deadline
+            if self._expected_wait() > self.queue_timeout:
+                self.rejected_deadline += 1
+                raise Rejected("queue deadline would be exceeded", self._retry_after())
+            self.waiting += 1
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected_deadline += 1
+                raise Rejected("queue deadline exceeded", self._retry_after())
+            finally:
+                self.waiting -= 1
+            self.max_wait = max(self.max_wait, time.monotonic() - started)
+        self.in_flight += 1
+        self.admitted += 1
+
+    def release(self, elapsed: float):
+        self.in_flight -= 1
+        self.service_time += _EWMA_ALPHA * (elapsed - self.service_time)
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_deadline": self.rejected_deadline,
+            "avg_service_seconds": round(self.service_time, 4),
+            "max_wait_seconds": round(self.max_wait, 4),
+        }
+
+
+class AdmissionController:
+    """Maps path prefixes (one per router) to their RouteLimit."""
+
+    def __init__(self, limits: Dict[str, RouteLimit]):
+        # Longest prefix first so "/chat/x" never matches a shorter prefix by accident
+        self.limits = dict(sorted(limits.items(), key=lambda item: len(item[0]), reverse=True))
+
+    def limit_for(self, path: str) -> Optional[RouteLimit]:
+        for prefix, limit in self.limits.items():
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return limit
+        return None
+
+    def stats(self) -> dict:
+        return {prefix: limit.stats() for prefix, limit in self.limits.items()}
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that admits, queues or sheds requests per AdmissionController."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        limit = self.controller.limit_for(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await limit.acquire()
+        except Rejected as e:
+            logger.warning(f"Shedding {scope['method']} {scope['path']}: {e.reason}")
+            await _send_unavailable(send, e)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release(time.monotonic() - started)
+
+
+async def _send_unavailable(send, rejection: Rejected):
+    body = json.dumps({"detail": f"Server is busy ({rejection.reason}). Please retry later."}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(rejection.retry_after).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
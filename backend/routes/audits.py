@@ -0,0 +1,109 @@
+# backend/routes/audits.py
+import os
+import logging
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from firebase_admin import firestore
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from routes.auth import verify_firebase_token, require_admin_or_partner
+from routes.carbon import AuditAnswers, calculate_emissions
+from services.ingestion import pipeline
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Largest number of audits accepted in one bulk import request
+MAX_BULK_AUDITS = int(os.getenv("AUDITS_MAX_BULK", 5000))
+
+# ----------------------------
+# Pydantic Models
+# ----------------------------
+class AuditSubmission(BaseModel):
+    user_id: str
+    answers: AuditAnswers
+    timestamp: Optional[datetime] = Field(None, description="When the audit was taken; defaults to the server time")
+
+
+class BulkAuditSubmission(BaseModel):
+    audits: List[AuditSubmission] = Field(..., min_length=1)
+
+
+# ----------------------------
+# Helpers
+# ----------------------------
+def _to_write(db, audit: AuditSubmission):
+    """Builds the write for one audit, precomputing its emissions."""
+    doc_id = db.collection("audits").document().id  # generated client-side, no round trip
+    data = {
+        "user_id": audit.user_id,
+        "answers": audit.answers.model_dump(),
+        "emissions": calculate_emissions(audit.answers),
+        "timestamp": audit.timestamp or firestore.SERVER_TIMESTAMP,
+    }
+    return ("audits", doc_id, data)
+
+
+def _write_sync(db, write):
+    collection, doc_id, data = write
+    db.collection(collection).document(doc_id).set(data)
+
+
+def _enqueue_or_reject(writes):
+    if not pipeline.try_enqueue(writes):
+        retry_after = pipeline.retry_after_seconds()
+        logger.warning(f"Ingestion pipeline saturated; rejected {len(writes)} audits.")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Audit ingestion is busy. Please retry later.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+# ----------------------------
+# Routes
+# ----------------------------
+@router.post("/", status_code=status.HTTP_201_CREATED)
+async def submit_audit(audit: AuditSubmission, current_user: dict = Depends(verify_firebase_token)):
+    """
+    Validates a single audit and writes it to Firestore before responding,
+    so the dashboard sees it as soon as the app navigates there.
+    Users may only submit audits for themselves.
+    """
+    if audit.user_id != current_user["uid"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot submit an audit for another user.")
+    db = firestore.client()
+    write = _to_write(db, audit)
+    try:
+        await run_in_threadpool(_write_sync, db, write)
+    except Exception as e:
+        logger.exception(f"Failed to save audit for {audit.user_id}")
+        raise HTTPException(status_code=500, detail="Failed to save audit")
+    return {"id": write[1], "status": "saved", "emissions": write[2]["emissions"]}
+
+
+@router.post("/bulk", status_code=status.HTTP_202_ACCEPTED)
+async def submit_audits_bulk(submission: BulkAuditSubmission, current_user: dict = Depends(require_admin_or_partner)):
+    """
+    Validates and queues many audits at once, e.g. a partner's historical import.
+    The request is accepted or rejected as a whole.
+    """
+    if len(submission.audits) > MAX_BULK_AUDITS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many audits; at most {MAX_BULK_AUDITS} are allowed per request.",
+        )
+    logger.info(f"Bulk import of {len(submission.audits)} audits by {current_user['uid']}")
+    db = firestore.client()
+    writes = [_to_write(db, audit) for audit in submission.audits]
+    _enqueue_or_reject(writes)
+    return {"ids": [write[1] for write in writes], "count": len(writes), "status": "queued"}
+
+
+@router.get("/stats")
+async def get_ingestion_stats():
+    """
+    Returns queue depth and commit throughput of the audit ingestion pipeline.
+    """
+    return pipeline.stats()
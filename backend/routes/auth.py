@@ -20,6 +20,18 @@ async def verify_firebase_token(token: str = Depends(oauth2_scheme)):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+# Firebase custom claims that allow bulk access to other users' data
+PRIVILEGED_CLAIMS = ("admin", "partner")
+
+# Dependency for bulk/admin endpoints: a verified token carrying an admin or partner claim
+async def require_admin_or_partner(current_user: dict = Depends(verify_firebase_token)):
+    if not any(current_user.get(claim) is True for claim in PRIVILEGED_CLAIMS):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This endpoint requires an admin or partner account.",
+        )
+    return current_user
+
 # --- THIS IS THE CORRECTED LINE ---
 # Change @router.get("/me") to @router.post("/me")
 @router.post("/me")
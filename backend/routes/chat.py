@@ -9,6 +9,9 @@ from pydantic import BaseModel
 from firebase_admin import firestore
 import google.generativeai as genai
 from google.api_core import exceptions as google_exceptions
+from services.conversation import conversations, COLLECTION as CONVERSATIONS_COLLECTION
+from services.retrieval import index as catalog_index, format_entries, state_from_location
+from services.gemini import GeminiClient, CircuitOpenError, GeminiBusyError, GeminiTimeoutError
 
 # --- Configuration ---
 router = APIRouter()
@@ -25,10 +28,12 @@ try:
         raise ValueError("GEMINI_API_KEY environment variable not set.")
     genai.configure(api_key=gemini_api_key)
     model = genai.GenerativeModel('gemini-1.0-pro')
+    gemini = GeminiClient(model)
     logger.info("Gemini API configured successfully.")
 except Exception as e:
     logger.error(f"Failed to configure Gemini API: {e}")
     model = None
+    gemini = None
 
 # --- Pydantic Model ---
 class ChatInput(BaseModel):
@@ -39,23 +44,43 @@ class ChatInput(BaseModel):
 rate_limit_tracker = {}
 
 # --- Helper Functions (Blocking) ---
-def _fetch_user_context_sync(user_id: str):
-    """Fetches user profile and latest audit from Firestore."""
+def _compact(data: dict) -> dict:
+    """Drops empty values so the prompt only carries fields that say something."""
+    return {k: v for k, v in data.items() if v not in (None, "", [], {})}
+
+def _fetch_user_context_sync(user_id: str, load_history: bool = False):
+    """Fetches user profile, latest audit and (optionally) saved conversation from Firestore."""
     db = firestore.client()
-    user_doc = db.collection("users").document(user_id).get()
+    refs = [db.collection("users").document(user_id)]
+    if load_history:
+        refs.append(db.collection(CONVERSATIONS_COLLECTION).document(user_id))
+    snapshots = {snap.reference.path: snap for snap in db.get_all(refs)}
+    user_doc = snapshots[refs[0].path]
+    history_doc = snapshots[refs[1].path] if load_history else None
     audit_query = db.collection("audits").where("user_id", "==", user_id).order_by("timestamp", direction=firestore.Query.DESCENDING).limit(1)
     audit_docs = list(audit_query.stream())
     
-    user_profile = user_doc.to_dict() if user_doc.exists else {"note": "No profile found"}
-    latest_audit = audit_docs[0].to_dict().get("answers", {}) if audit_docs else {}
+    user_profile = _compact(user_doc.to_dict()) if user_doc.exists else {"note": "No profile found"}
+    latest_audit = _compact(audit_docs[0].to_dict().get("answers", {})) if audit_docs else {}
+    history = history_doc.to_dict() if history_doc is not None and history_doc.exists else None
     
-    return user_profile, latest_audit
+    return user_profile, latest_audit, history
 
-def _generate_gemini_content_sync(prompt: str):
-    """Calls the Gemini API to generate content."""
+async def _generate_gemini_content(prompt: str):
+    """Calls the Gemini API through the resilient client and maps its failures to HTTP errors."""
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return await gemini.generate(prompt)
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI service is temporarily unavailable. Please try again shortly.",
+            headers={"Retry-After": str(max(1, int(e.retry_after)))},
+        )
+    except GeminiBusyError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="AI service is busy. Please try again shortly.")
+    except GeminiTimeoutError:
+        logger.error("Gemini API call timed out.")
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="AI service did not respond in time.")
     except google_exceptions.GoogleAPICallError as e:
         logger.error(f"Google API Call Error: {e}")
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"AI service call failed: {e.message}")
@@ -82,8 +107,13 @@ async def handle_chat(input_data: ChatInput):
     try:
         logger.info(f"Chat request from {user_id}: {input_data.message}")
         
-        # Fetch data in a threadpool to avoid blocking
-        user_profile, latest_audit = await run_in_threadpool(_fetch_user_context_sync, user_id)
+        # Fetch data in a threadpool to avoid blocking; saved history is only read on a cache miss
+        conversation = conversations.get(user_id)
+        user_profile, latest_audit, history = await run_in_threadpool(
+            _fetch_user_context_sync, user_id, conversation is None
+        )
+        if conversation is None:
+            conversation = conversations.load(user_id, history)
 
         # Build a hardened prompt
         system_prompt = """
@@ -91,19 +121,43 @@ async def handle_chat(input_data: ChatInput):
         - Provide concise, positive, safe, and actionable advice based on the user's data.
         - Focus ONLY on home energy efficiency, sustainability, and related savings.
         - Politely decline any requests that are off-topic.
+        - Only recommend rebates or contractors listed in the catalog entries provided.
         """
-        prompt = f"{system_prompt}\n\nUser Profile: {user_profile}\nLatest Home Audit: {latest_audit}\n\nUser message: \"{input_data.message}\""
+        prompt = f"{system_prompt}\n\nUser Profile: {user_profile}\nLatest Home Audit: {latest_audit}"
+
+        # Only the catalog entries relevant to this message are added to the prompt
+        state = state_from_location(user_profile.get("location"))
+        catalog_entries = format_entries(catalog_index.search(input_data.message, state))
+        if catalog_entries:
+            prompt += f"\n\nRelevant Veridian catalog entries:\n{catalog_entries}"
+
+        history_section = conversation.render()
+        if history_section:
+            prompt += f"\n\n{history_section}"
+        prompt += f"\n\nUser message: \"{input_data.message}\""
         
-        # Generate content in a threadpool
-        reply = await run_in_threadpool(_generate_gemini_content_sync, prompt)
+        # Generate content without holding a threadpool worker for the whole call
+        reply = await _generate_gemini_content(prompt)
 
         if not reply:
             raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="AI service returned an empty response.")
 
+        # Remember the turn; persistence happens off the request path
+        conversations.record_turn(user_id, conversation, input_data.message, reply)
+
         return {"reply": reply}
 
     except HTTPException:
         raise # Re-raise HTTPException to preserve status code and detail
     except Exception as e:
         logger.exception(f"Error processing chat request for user {user_id}: {e}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An error occurred while processing your request.")
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An error occurred while processing your request.")
+
+@router.get("/stats")
+async def get_chat_stats():
+    """
+    Returns Gemini client counters: retries, hedges, timeouts, latency and breaker state.
+    """
+    if not gemini:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="AI service is not configured or available.")
+    return gemini.stats()
\ No newline at end of file
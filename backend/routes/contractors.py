@@ -4,6 +4,7 @@ from fastapi import APIRouter, HTTPException, Query
 from firebase_admin import firestore
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional
+from services.catalog import catalog
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -33,6 +34,16 @@ async def get_contractors(filter_data: ContractorFilter):
     Fetch contractors based on location and a list of required services.
     Returns contractors from the user's state/region and national providers ("AUS").
     """
+    # Serve from the in-memory catalog when it is loaded
+    cached = catalog.get("contractors")
+    if cached is not None:
+        contractors = [
+            c for c in cached
+            if c.get("location") in (filter_data.location, "AUS")
+            and set(c.get("services") or []) & set(filter_data.services)
+        ]
+        return {"count": len(contractors), "contractors": contractors}
+
     try:
         db = firestore.client()
 
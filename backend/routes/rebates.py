@@ -2,6 +2,7 @@
 from fastapi import APIRouter, HTTPException
 from firebase_admin import firestore
 from pydantic import BaseModel
+from services.catalog import catalog
 
 # Create a router, which is like a mini-FastAPI app
 router = APIRouter()
@@ -18,6 +19,17 @@ async def get_rebates(filter: RebateFilter):
     Fetches rebates from Firestore based on the user's location and income.
     Includes both state-specific and federal ("AUS") rebates.
     """
+    # Serve from the in-memory catalog when it is loaded
+    cached = catalog.get("rebates")
+    if cached is not None:
+        rebates = [
+            r for r in cached
+            if r.get("location") in (filter.location, "AUS")
+            and isinstance(r.get("income_max"), (int, float))
+            and r["income_max"] >= filter.income
+        ]
+        return {"rebates": rebates}
+
     try:
         db = firestore.client()
         
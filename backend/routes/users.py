@@ -1,13 +1,67 @@
 # backend/routes/users.py
-from fastapi import APIRouter, HTTPException
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 from config.db import db
+from routes.auth import require_admin_or_partner
 
 router = APIRouter()
 
+# Upper bound on how many IDs a single batch request may resolve
+MAX_BATCH_USERS = int(os.getenv("USERS_MAX_BATCH_SIZE", 300))
+
+# ----------------------------
+# Pydantic Model
+# ----------------------------
+class UserBatchRequest(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, description="User IDs to resolve")
+    fields: Optional[List[str]] = Field(None, description="Optional field mask; omit to return every field")
+
+
+# ----------------------------
+# Helpers (Blocking)
+# ----------------------------
+def _fetch_users(user_ids: List[str], fields: Optional[List[str]] = None):
+    """
+    Resolves a set of user documents with a single get_all round trip.
+    Returns a dict of found profiles keyed by ID and a list of missing IDs.
+    """
+    # Drop duplicates but keep the caller's ordering for the missing list
+    unique_ids = list(dict.fromkeys(user_ids))
+    refs = [db.collection("users").document(uid) for uid in unique_ids]
+
+    found: Dict[str, dict] = {}
+    for snapshot in db.get_all(refs, field_paths=fields or None):
+        if snapshot.exists:
+            found[snapshot.id] = snapshot.to_dict()
+
+    missing = [uid for uid in unique_ids if uid not in found]
+    return found, missing
+
+
+# ----------------------------
+# Routes
+# ----------------------------
+@router.post("/batch")
+async def get_users_batch(request: UserBatchRequest, current_user: dict = Depends(require_admin_or_partner)):
+    """
+    Fetches many user profiles in one Firestore call; admin and partner accounts only.
+    Results are keyed by user ID; IDs with no profile are listed under "missing".
+    """
+    if len(request.user_ids) > MAX_BATCH_USERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many user IDs; at most {MAX_BATCH_USERS} are allowed per request.",
+        )
+    users, missing = await run_in_threadpool(_fetch_users, request.user_ids, request.fields)
+    return {"users": users, "missing": missing}
+
+
 @router.get("/{user_id}")
-async def get_user(user_id: str):
-    doc_ref = db.collection("users").document(user_id)
-    doc = doc_ref.get()
-    if doc.exists:
-        return doc.to_dict()
-    raise HTTPException(status_code=404, detail="User not found")
\ No newline at end of file
+async def get_user(user_id: str, fields: Optional[List[str]] = Query(None)):
+    users, _ = await run_in_threadpool(_fetch_users, [user_id], fields)
+    if user_id in users:
+        return users[user_id]
+    raise HTTPException(status_code=404, detail="User not found")
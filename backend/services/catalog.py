@@ -0,0 +1,204 @@
+# backend/services/catalog.py
+import os
+import json
+import logging
+import mmap
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+from fastapi.encoders import jsonable_encoder
+from firebase_admin import firestore
+
+logger = logging.getLogger("catalog")
+
+# --- Configuration ---
+backend_dir = Path(__file__).resolve().parent.parent
+SNAPSHOT_PATH = Path(os.getenv("CATALOG_SNAPSHOT_PATH", backend_dir / ".cache" / "catalog.snapshot"))
+# Snapshots older than this are considered dead and ignored on startup
+SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv("CATALOG_SNAPSHOT_MAX_AGE_SECONDS", 7 * 24 * 3600))
+
+COLLECTIONS = ("rebates", "contractors")
+
+# --- Snapshot file layout (little-endian) ---
+# Header:  magic, format version, section count, catalog version, written_at, crc32 of everything after the header
+# Section: name, offset, length, document count -- followed by zlib-compressed JSON arrays
+SNAPSHOT_MAGIC = b"VCAT"
+SNAPSHOT_FORMAT_VERSION = 2
+_HEADER = struct.Struct("<4sHHQQI")
+_SECTION = struct.Struct("<16sQQI")
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is truncated, corrupt or from an incompatible version."""
+
+
+def _normalize(docs: List[dict]) -> List[dict]:
+    # Encode the way FastAPI would (timestamps as ISO-8601, ...) so cached documents
+    # serialize exactly like the Firestore query path and compare equal to ones read from disk
+    return jsonable_encoder(docs)
+
+
+def encode_snapshot(collections: Dict[str, List[dict]], version: int) -> bytes:
+    sections = []
+    payloads = []
+    offset = _HEADER.size + _SECTION.size * len(collections)
+    for name, docs in collections.items():
+        payload = zlib.compress(json.dumps(_normalize(docs), separators=(",", ":")).encode("utf-8"))
+        sections.append(_SECTION.pack(name.encode("utf-8"), offset, len(payload), len(docs)))
+        payloads.append(payload)
+        offset += len(payload)
+    body = b"".join(sections) + b"".join(payloads)
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(collections), version,
+                          int(time.time()), zlib.crc32(body))
+    return header + body
+
+
+def decode_snapshot(buffer) -> dict:
+    """
+    Parses a snapshot from any buffer (bytes or mmap).
+    Returns {"version", "written_at", "collections"} or raises SnapshotError.
+    """
+    if len(buffer) < _HEADER.size:
+        raise SnapshotError("snapshot is truncated")
+    magic, format_version, count, version, written_at, crc = _HEADER.unpack_from(buffer, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError("not a catalog snapshot")
+    if format_version != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f"incompatible snapshot format {format_version}")
+    if zlib.crc32(buffer[_HEADER.size:]) != crc:
+        raise SnapshotError("snapshot checksum mismatch")
+
+    collections = {}
+    for i in range(count):
+        name, offset, length, doc_count = _SECTION.unpack_from(buffer, _HEADER.size + i * _SECTION.size)
+        docs = json.loads(zlib.decompress(buffer[offset:offset + length]))
+        if len(docs) != doc_count:
+            raise SnapshotError(f"section {name!r} has {len(docs)} documents, expected {doc_count}")
+        collections[name.rstrip(b"\0").decode("utf-8")] = docs
+    return {"version": version, "written_at": written_at, "collections": collections}
+
+
+class Catalog:
+    """
+    In-memory copy of the rebate and contractor collections.
+    Warm-starts from the on-disk snapshot, then stays in sync through Firestore
+    listeners and rewrites the snapshot whenever the data changes.
+    """
+
+    def __init__(self, path: Path = SNAPSHOT_PATH, collections=COLLECTIONS):
+        self.path = Path(path)
+        self.names = tuple(collections)
+        self.version = 0
+        self._lock = threading.Lock()
+        self._collections: Dict[str, List[dict]] = {}
+        self._sources: Dict[str, str] = {}
+        self._watches = []
+        self._subscribers = []
+
+    def get(self, name: str) -> Optional[List[dict]]:
+        """Returns the cached documents, or None if the collection is not loaded yet."""
+        return self._collections.get(name)
+
+    # --- Snapshot I/O ---
+    def load_snapshot(self) -> bool:
+        if not self.path.exists():
+            return False
+        try:
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                snapshot = decode_snapshot(mm)
+            age = time.time() - snapshot["written_at"]
+            if age > SNAPSHOT_MAX_AGE_SECONDS:
+                raise SnapshotError(f"snapshot is {int(age)}s old")
+            if set(snapshot["collections"]) != set(self.names):
+                raise SnapshotError(f"snapshot holds {sorted(snapshot['collections'])}, expected {sorted(self.names)}")
+        except (OSError, ValueError, zlib.error, struct.error, SnapshotError) as e:
+            logger.warning(f"Discarding catalog snapshot {self.path}: {e}")
+            self.path.unlink(missing_ok=True)
+            return False
+
+        with self._lock:
+            self.version = snapshot["version"]
+            for name, docs in snapshot["collections"].items():
+                self._collections[name] = docs
+                self._sources[name] = "snapshot"
+        logger.info(f"Loaded catalog snapshot v{self.version} from {self.path}.")
+        self._notify()
+        return True
+
+    def _write_snapshot(self):
+        """Writes atomically so a crash mid-write never leaves a half-written snapshot behind."""
+        if not all(name in self._collections for name in self.names):
+            return
+        data = encode_snapshot({name: self._collections[name] for name in self.names}, self.version)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Failed to write catalog snapshot: {e}")
+
+    # --- Firestore reconciliation ---
+    def start(self):
+        """Loads the snapshot, then reconciles with Firestore in the background."""
+        self.load_snapshot()
+        try:
+            db = firestore.client()
+            for name in self.names:
+                self._watches.append(db.collection(name).on_snapshot(self._listener(name)))
+        except Exception as e:
+            logger.error(f"Failed to start catalog listeners: {e}")
+
+    def stop(self):
+        for watch in self._watches:
+            watch.unsubscribe()
+        self._watches = []
+
+    def _listener(self, name: str):
+        def on_snapshot(col_snapshot, changes, read_time):
+            docs = _normalize([{"id": doc.id, **doc.to_dict()} for doc in col_snapshot])
+            self.replace(name, docs)
+        return on_snapshot
+
+    def replace(self, name: str, docs: List[dict]):
+        """Swaps in a fresh copy of a collection, bumping the version if anything changed."""
+        with self._lock:
+            self._sources[name] = "firestore"
+            if self._collections.get(name) == docs:
+                return
+            self._collections[name] = docs
+            self.version += 1
+            logger.info(f"Catalog collection '{name}' updated ({len(docs)} documents), now v{self.version}.")
+            self._write_snapshot()
+        self._notify()
+
+    # --- Change notifications ---
+    def subscribe(self, callback):
+        """Registers callback(catalog), called now and after every change."""
+        self._subscribers.append(callback)
+        callback(self)
+
+    def _notify(self):
+        for callback in self._subscribers:
+            try:
+                callback(self)
+            except Exception:
+                logger.exception("Catalog subscriber failed")
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "collections": {
+                name: {"documents": len(self._collections.get(name) or []), "source": self._sources.get(name)}
+                for name in self.names
+            },
+        }
+
+
+catalog = Catalog()
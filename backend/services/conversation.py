@@ -0,0 +1,249 @@
+# backend/services/conversation.py
+import os
+import asyncio
+import logging
+import time
+from collections import deque, OrderedDict
+from typing import Dict, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from firebase_admin import firestore
+
+logger = logging.getLogger("conversation_memory")
+
+# --- Configuration ---
+# How many recent turns are kept verbatim per user (ring buffer size)
+HISTORY_TURNS = int(os.getenv("CHAT_HISTORY_TURNS", 6))
+# Older turns are folded into a rolling summary capped at this many characters
+SUMMARY_MAX_CHARS = int(os.getenv("CHAT_SUMMARY_MAX_CHARS", 1200))
+# Approximate token budget for the conversation section of the prompt
+HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", 800))
+# How many users' conversations are held in memory before the least recent is evicted
+MAX_CACHED_USERS = int(os.getenv("CHAT_MEMORY_MAX_USERS", 1000))
+# Write-behind persistence: flush when this many users are dirty or after this many seconds
+PERSIST_BATCH_SIZE = int(os.getenv("CHAT_PERSIST_BATCH_SIZE", 100))
+PERSIST_FLUSH_SECONDS = float(os.getenv("CHAT_PERSIST_FLUSH_SECONDS", 2.0))
+
+COLLECTION = "conversations"
+
+# Per-turn clipping used when an old turn is folded into the summary
+_SUMMARY_USER_CHARS = 120
+_SUMMARY_REPLY_CHARS = 160
+# Smallest share of the budget worth giving to a clipped recent turn
+_MIN_CLIPPED_TURN_TOKENS = 60
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 3].rstrip() + "..."
+
+
+# ----------------------------
+# Per-user conversation state
+# ----------------------------
+class Conversation:
+    """A fixed-size ring buffer of recent turns plus a rolling summary of older ones."""
+
+    def __init__(self, turns: Optional[List[dict]] = None, summary: str = ""):
+        self.turns = deque(turns or [], maxlen=HISTORY_TURNS)
+        self.summary = summary
+
+    def add_turn(self, user_message: str, reply: str):
+        # The oldest turn is about to fall out of the buffer; keep its gist
+        if len(self.turns) == self.turns.maxlen:
+            self._fold_into_summary(self.turns[0])
+        self.turns.append({"user": user_message, "advisor": reply, "timestamp": time.time()})
+
+    def _fold_into_summary(self, turn: dict):
+        line = f"- User asked: {_clip(turn['user'], _SUMMARY_USER_CHARS)} | Advisor: {_clip(turn['advisor'], _SUMMARY_REPLY_CHARS)}"
+        summary = f"{self.summary}\n{line}" if self.summary else line
+        # Keep the most recent part of the summary when it grows too long
+        if len(summary) > SUMMARY_MAX_CHARS:
+            summary = summary[-SUMMARY_MAX_CHARS:]
+            summary = summary[summary.find("\n") + 1:] if "\n" in summary else summary
+        self.summary = summary
+
+    def render(self, token_budget: int = HISTORY_TOKEN_BUDGET) -> str:
+        """
+        Renders the most recent turns first, clipping one that is too long rather than
+        dropping it, then spends whatever budget is left on the rolling summary.
+        Returns an empty string when there is no history yet.
+        """
+        used = estimate_tokens("Recent messages:") + 1
+        recent = []
+        for turn in reversed(self.turns):
+            block = f"User: {turn['user']}\nVeridian: {turn['advisor']}"
+            remaining = token_budget - used
+            if estimate_tokens(block) > remaining:
+                # Only clip when enough room is left for the turn to still say something
+                if remaining < _MIN_CLIPPED_TURN_TOKENS and recent:
+                    break
+                chars = max(remaining, _MIN_CLIPPED_TURN_TOKENS) * 4 - len("User: \nVeridian: ") - 8
+                user_chars = min(len(turn["user"]), chars // 3)
+                block = f"User: {_clip(turn['user'], user_chars)}\nVeridian: {_clip(turn['advisor'], chars - user_chars)}"
+            recent.append(block)
+            used += estimate_tokens(block) + 1
+            if used >= token_budget:
+                break
+
+        sections = []
+        summary = self._summary_within(token_budget - used)
+        if summary:
+            sections.append(f"Earlier in this conversation:\n{summary}")
+        if recent:
+            sections.append("Recent messages:\n" + "\n".join(reversed(recent)))
+        return "\n\n".join(sections)
+
+    def _summary_within(self, token_budget: int) -> str:
+        """The newest summary lines that fit the budget."""
+        lines = []
+        used = estimate_tokens("Earlier in this conversation:") + 1
+        for line in reversed(self.summary.splitlines()):
+            cost = estimate_tokens(line) + 1
+            if used + cost > token_budget:
+                break
+            lines.append(line)
+            used += cost
+        return "\n".join(reversed(lines))
+
+    def to_dict(self) -> dict:
+        return {"summary": self.summary, "turns": list(self.turns), "updated_at": time.time()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Conversation":
+        return cls(turns=data.get("turns", []), summary=data.get("summary", ""))
+
+
+# ----------------------------
+# Write-behind persistence
+# ----------------------------
+class WriteBehindQueue:
+    """
+    Collects dirty conversations and persists them to Firestore in batch commits
+    from a background task. Multiple updates for the same user between flushes
+    coalesce into a single write.
+    """
+
+    def __init__(self, batch_size: int = PERSIST_BATCH_SIZE, flush_seconds: float = PERSIST_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending: Dict[str, dict] = {}
+        self._committing: Dict[str, dict] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def unflushed(self, user_id: str) -> Optional[dict]:
+        """The newest payload for a user that Firestore may not have yet, if any."""
+        return self._pending.get(user_id) or self._committing.get(user_id)
+
+    def enqueue(self, user_id: str, payload: dict):
+        self._pending[user_id] = payload
+        self._ensure_running()
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            # The event is bound to the loop it was first awaited on
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Writes every pending conversation, at most batch_size per commit."""
+        while self._pending:
+            items = list(self._pending.items())[: self.batch_size]
+            for user_id, payload in items:
+                del self._pending[user_id]
+                self._committing[user_id] = payload
+            try:
+                await run_in_threadpool(_commit_batch, items)
+            except Exception as e:
+                logger.error(f"Failed to persist {len(items)} conversations: {e}")
+                # Put them back unless a newer version was queued meanwhile
+                for user_id, payload in items:
+                    self._pending.setdefault(user_id, payload)
+                return
+            finally:
+                for user_id, _ in items:
+                    self._committing.pop(user_id, None)
+
+    async def stop(self):
+        """Cancels the background task and flushes whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+def _commit_batch(items):
+    db = firestore.client()
+    batch = db.batch()
+    for user_id, payload in items:
+        batch.set(db.collection(COLLECTION).document(user_id), payload)
+    batch.commit()
+
+
+# ----------------------------
+# In-memory store
+# ----------------------------
+class ConversationStore:
+    """LRU-bounded map of user ID -> Conversation, backed by the write-behind queue."""
+
+    def __init__(self, max_users: int = MAX_CACHED_USERS):
+        self.max_users = max_users
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self.writer = WriteBehindQueue()
+
+    def get(self, user_id: str) -> Optional[Conversation]:
+        conversation = self._conversations.get(user_id)
+        if conversation is not None:
+            self._conversations.move_to_end(user_id)
+        return conversation
+
+    def load(self, user_id: str, data: Optional[dict]) -> Conversation:
+        """
+        Caches a conversation loaded from Firestore (or a fresh one if none exists).
+        A version still waiting in the write-behind queue is newer than Firestore's, so it wins.
+        """
+        conversation = self.get(user_id)
+        if conversation is None:
+            data = self.writer.unflushed(user_id) or data
+            conversation = Conversation.from_dict(data) if data else Conversation()
+            self._put(user_id, conversation)
+        return conversation
+
+    def record_turn(self, user_id: str, conversation: Conversation, user_message: str, reply: str):
+        """
+        Appends a turn to the conversation the request has been holding. It is put back
+        in the cache because it may have been evicted while waiting on the model.
+        """
+        conversation.add_turn(user_message, reply)
+        self._put(user_id, conversation)
+        self.writer.enqueue(user_id, conversation.to_dict())
+
+    def _put(self, user_id: str, conversation: Conversation):
+        self._conversations[user_id] = conversation
+        self._conversations.move_to_end(user_id)
+        while len(self._conversations) > self.max_users:
+            self._conversations.popitem(last=False)
+
+
+conversations = ConversationStore()
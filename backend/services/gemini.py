@@ -0,0 +1,254 @@
+# backend/services/gemini.py
+import os
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Optional
+from google.api_core import exceptions as google_exceptions
+
+logger = logging.getLogger("gemini_client")
+
+# --- Configuration ---
+MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 8))
+# Total time a single generate() call may take, retries and hedges included
+CALL_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", 20.0))
+MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", 3))
+BACKOFF_BASE_SECONDS = float(os.getenv("GEMINI_BACKOFF_BASE_SECONDS", 0.25))
+BACKOFF_MAX_SECONDS = float(os.getenv("GEMINI_BACKOFF_MAX_SECONDS", 2.0))
+# Send a second, hedged request when the first is slower than the observed p95
+HEDGE_ENABLED = os.getenv("GEMINI_HEDGE", "1") == "1"
+HEDGE_MIN_SAMPLES = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", 20))
+# Circuit breaker: open after this many consecutive failed calls, probe again after the cool-down
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("GEMINI_BREAKER_FAILURES", 5))
+BREAKER_RESET_SECONDS = float(os.getenv("GEMINI_BREAKER_RESET_SECONDS", 30.0))
+
+# Upstream errors worth another attempt: 5xx, 429 and aborted calls
+RETRYABLE_ERRORS = (
+    google_exceptions.ServerError,
+    google_exceptions.TooManyRequests,
+    google_exceptions.Aborted,
+)
+
+_LATENCY_SAMPLES = 200
+
+
+class GeminiUnavailableError(Exception):
+    """Base class for failures raised by the client itself rather than by the API."""
+
+
+class CircuitOpenError(GeminiUnavailableError):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("AI service is temporarily unavailable.")
+        self.retry_after = retry_after
+
+
+class GeminiTimeoutError(GeminiUnavailableError):
+    """Raised when upstream does not respond within the call's deadline."""
+
+
+class GeminiBusyError(GeminiUnavailableError):
+    """Raised when no concurrency slot frees up before the deadline; upstream is not blamed."""
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open single probe -> closed."""
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self):
+        if self.state == "open":
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.reset_seconds:
+                raise CircuitOpenError(self.reset_seconds - elapsed)
+            self.state = "half_open"
+        if self.state == "half_open":
+            # Only one probe at a time while we find out whether upstream recovered
+            if self._probe_in_flight:
+                raise CircuitOpenError(1.0)
+            self._probe_in_flight = True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        if self.state == "open":
+            # Late failures from calls started before the breaker opened must not extend the cool-down
+            return
+        self._probe_in_flight = False
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            logger.warning(f"Gemini circuit opened after {self.failures} consecutive failures.")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        """Frees the half-open probe slot when a call ended without a verdict."""
+        self._probe_in_flight = False
+
+
+class GeminiClient:
+    """
+    Async wrapper around a Gemini model with a concurrency cap, per-call deadline,
+    jittered retries, optional hedged requests and a circuit breaker.
+
+    Any object exposing generate_content_async(prompt) or generate_content(prompt)
+    returning something with a .text attribute works as the model, so a local fake
+    can stand in for the real API.
+    """
+
+    def __init__(self, model, max_concurrency: int = MAX_CONCURRENCY, timeout: float = CALL_TIMEOUT_SECONDS,
+                 max_attempts: int = MAX_ATTEMPTS, backoff_base: float = BACKOFF_BASE_SECONDS,
+                 backoff_max: float = BACKOFF_MAX_SECONDS, hedge: bool = HEDGE_ENABLED,
+                 hedge_min_samples: int = HEDGE_MIN_SAMPLES, breaker: Optional[CircuitBreaker] = None):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self._in_flight = 0
+        self._latencies = deque(maxlen=_LATENCY_SAMPLES)
+        self._stats = {"calls": 0, "successes": 0, "failures": 0, "retries": 0,
+                       "hedges": 0, "hedge_wins": 0, "timeouts": 0, "busy": 0, "short_circuited": 0}
+
+    # --- Public API ---
+    async def generate(self, prompt: str) -> str:
+        """
+        Returns the model's reply text. Raises CircuitOpenError, GeminiBusyError,
+        GeminiTimeoutError, or the last GoogleAPICallError once retries are exhausted.
+        """
+        self._stats["calls"] += 1
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self._stats["short_circuited"] += 1
+            raise
+
+        deadline = time.monotonic() + self.timeout
+        try:
+            text = await self._generate_with_retries(prompt, deadline)
+        except (GeminiTimeoutError, *RETRYABLE_ERRORS):
+            self._stats["failures"] += 1
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # Bad requests, local saturation and cancellations say nothing about upstream health
+            self._stats["failures"] += 1
+            self.breaker.release_probe()
+            raise
+        self._stats["successes"] += 1
+        self.breaker.record_success()
+        return text
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "in_flight": self._in_flight,
+            "p95_latency_seconds": round(self._p95() or 0.0, 3),
+            "breaker_state": self.breaker.state,
+        }
+
+    # --- Internals ---
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    def _p95(self) -> Optional[float]:
+        if len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    async def _generate_with_retries(self, prompt: str, deadline: float) -> str:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return await self._attempt(prompt, deadline)
+            except RETRYABLE_ERRORS as e:
+                remaining = deadline - time.monotonic()
+                if attempt == self.max_attempts or remaining <= 0:
+                    raise
+                # Full jitter keeps retries from many requests from lining up
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+                if delay >= remaining:
+                    raise
+                logger.warning(f"Gemini call failed ({e.__class__.__name__}), retrying in {delay:.2f}s "
+                               f"(attempt {attempt}/{self.max_attempts}).")
+                self._stats["retries"] += 1
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, prompt: str, deadline: float) -> str:
+        """One logical attempt: a primary request plus, if it is slow, one hedged request."""
+        primary = asyncio.ensure_future(self._call(prompt, deadline))
+        tasks = {primary}
+        try:
+            hedge_delay = self._p95() if self.hedge else None
+            if hedge_delay is not None and hedge_delay < deadline - time.monotonic():
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                # Hedge only when the pool has room, so hedges never queue ahead of new calls
+                if not done and not self._get_semaphore().locked():
+                    self._stats["hedges"] += 1
+                    tasks.add(asyncio.ensure_future(self._call(prompt, deadline)))
+
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                # Look at every finished task so no exception goes unretrieved
+                errors = [task.exception() for task in done]
+                for task, task_error in zip(done, errors):
+                    if task_error is None:
+                        if task is not primary:
+                            self._stats["hedge_wins"] += 1
+                        return task.result()
+                error = error or errors[0]
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _call(self, prompt: str, deadline: float) -> str:
+        """A single upstream request holding one concurrency slot, bounded by the deadline."""
+        semaphore = self._get_semaphore()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self._stats["busy"] += 1
+            raise GeminiBusyError("Timed out waiting for a free AI service slot.")
+        self._in_flight += 1
+        try:
+            started = time.monotonic()
+            try:
+                response = await asyncio.wait_for(self._invoke(prompt), timeout=max(0.0, deadline - started))
+            except asyncio.TimeoutError:
+                self._stats["timeouts"] += 1
+                raise GeminiTimeoutError("AI service did not respond in time.")
+            self._latencies.append(time.monotonic() - started)
+            return response.text
+        finally:
+            self._in_flight -= 1
+            semaphore.release()
+
+    async def _invoke(self, prompt: str):
+        if hasattr(self.model, "generate_content_async"):
+            return await self.model.generate_content_async(prompt)
+        return await asyncio.to_thread(self.model.generate_content, prompt)
@@ -0,0 +1,163 @@
+# backend/services/ingestion.py
+import os
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from firebase_admin import firestore
+
+logger = logging.getLogger("ingestion")
+
+# --- Configuration ---
+# Maximum number of documents waiting to be written before submissions are refused
+MAX_QUEUE_DEPTH = int(os.getenv("INGEST_MAX_QUEUE_DEPTH", 20000))
+# Firestore caps a batch at 500 writes
+BATCH_SIZE = min(int(os.getenv("INGEST_BATCH_SIZE", 500)), 500)
+# How long the worker waits for more documents before committing a partial batch
+LINGER_SECONDS = float(os.getenv("INGEST_LINGER_SECONDS", 0.25))
+# Attempts per batch before it is dropped and counted as failed
+COMMIT_ATTEMPTS = int(os.getenv("INGEST_COMMIT_ATTEMPTS", 3))
+# Window used to compute commit throughput
+THROUGHPUT_WINDOW_SECONDS = 60.0
+
+
+class IngestionPipeline:
+    """
+    Bounded async queue of (collection, doc_id, data) writes, drained by a single
+    worker that groups them into Firestore batch commits.
+    """
+
+    def __init__(self, max_depth: int = MAX_QUEUE_DEPTH, batch_size: int = BATCH_SIZE,
+                 linger_seconds: float = LINGER_SECONDS):
+        self.max_depth = max_depth
+        self.batch_size = batch_size
+        self.linger_seconds = linger_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight = 0
+        self._commits = 0
+        self._committed_docs = 0
+        self._failed_docs = 0
+        self._rejected_docs = 0
+        self._recent_commits = deque()  # (timestamp, doc_count)
+
+    # --- Producer side ---
+    def try_enqueue(self, writes: List[Tuple[str, str, dict]]) -> bool:
+        """
+        Queues every write or none of them. Returns False when the pipeline is
+        saturated so the caller can push back on the client.
+        """
+        queue = self._ensure_running()
+        if queue.qsize() + len(writes) > self.max_depth:
+            self._rejected_docs += len(writes)
+            return False
+        for write in writes:
+            queue.put_nowait(write)
+        return True
+
+    def retry_after_seconds(self) -> int:
+        """Estimated time for the current backlog to drain, clamped to 1-60 seconds."""
+        depth = self._queue.qsize() if self._queue else 0
+        throughput = self._throughput()
+        if throughput <= 0:
+            return 5
+        return max(1, min(60, math.ceil(depth / throughput)))
+
+    def _ensure_running(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or (self._task is not None and self._task.get_loop() is not loop):
+            # First use, or the app was restarted on a new event loop
+            self._queue = asyncio.Queue(maxsize=self.max_depth)
+            self._task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        return self._queue
+
+    # --- Consumer side ---
+    async def _run(self):
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.linger_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Grab anything else that is already waiting without blocking
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            self._in_flight = len(batch)
+            try:
+                await self._commit_with_retry(batch)
+            finally:
+                self._in_flight = 0
+                for _ in batch:
+                    queue.task_done()
+
+    async def _commit_with_retry(self, batch):
+        for attempt in range(1, COMMIT_ATTEMPTS + 1):
+            try:
+                await run_in_threadpool(_commit_batch, batch)
+            except Exception as e:
+                logger.warning(f"Batch commit of {len(batch)} documents failed (attempt {attempt}/{COMMIT_ATTEMPTS}): {e}")
+                if attempt < COMMIT_ATTEMPTS:
+                    await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+                continue
+            self._commits += 1
+            self._committed_docs += len(batch)
+            self._recent_commits.append((time.monotonic(), len(batch)))
+            return
+        self._failed_docs += len(batch)
+        logger.error(f"Dropped a batch of {len(batch)} documents after {COMMIT_ATTEMPTS} attempts.")
+
+    async def stop(self):
+        """Waits for queued writes to be committed, then stops the worker."""
+        if self._queue is not None and self._task is not None and not self._task.done():
+            await self._queue.join()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # --- Stats ---
+    def _throughput(self) -> float:
+        cutoff = time.monotonic() - THROUGHPUT_WINDOW_SECONDS
+        while self._recent_commits and self._recent_commits[0][0] < cutoff:
+            self._recent_commits.popleft()
+        docs = sum(count for _, count in self._recent_commits)
+        return docs / THROUGHPUT_WINDOW_SECONDS
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_capacity": self.max_depth,
+            "in_flight": self._in_flight,
+            "commits": self._commits,
+            "committed_docs": self._committed_docs,
+            "failed_docs": self._failed_docs,
+            "rejected_docs": self._rejected_docs,
+            "docs_per_second": round(self._throughput(), 2),
+        }
+
+
+def _commit_batch(batch):
+    db = firestore.client()
+    write_batch = db.batch()
+    for collection, doc_id, data in batch:
+        write_batch.set(db.collection(collection).document(doc_id), data)
+    write_batch.commit()
+
+
+pipeline = IngestionPipeline()
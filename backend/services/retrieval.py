@@ -0,0 +1,141 @@
+# backend/services/retrieval.py
+import os
+import logging
+import re
+import threading
+import zlib
+from typing import List, Optional
+import numpy as np
+
+logger = logging.getLogger("retrieval")
+
+# --- Configuration ---
+# Size of the hashed feature space; some n-grams share a bucket, which only adds a little noise to scores
+HASH_DIM = int(os.getenv("RETRIEVAL_HASH_DIM", 4096))
+# How many catalog entries are added to a chat prompt
+TOP_K = int(os.getenv("RETRIEVAL_TOP_K", 4))
+# Entries scoring below this cosine similarity are never injected
+MIN_SCORE = float(os.getenv("RETRIEVAL_MIN_SCORE", 0.05))
+
+# Fields that describe an entry, per collection; anything else is ignored for matching
+TEXT_FIELDS = {
+    "rebates": ("name", "title", "description", "location"),
+    "contractors": ("name", "services", "description", "location"),
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _features(text: str) -> np.ndarray:
+    """Hashed unigram + bigram ids for a piece of text."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) % HASH_DIM for g in grams), dtype=np.int64, count=len(grams))
+
+
+def _term_counts(text: str) -> np.ndarray:
+    return np.bincount(_features(text), minlength=HASH_DIM).astype(np.float32)
+
+
+def _entry_text(kind: str, doc: dict) -> str:
+    parts = []
+    for field in TEXT_FIELDS[kind]:
+        value = doc.get(field)
+        if isinstance(value, list):
+            parts.append(" ".join(str(v) for v in value))
+        elif value is not None:
+            parts.append(str(value))
+    return " ".join(parts)
+
+
+def state_from_location(location: Optional[str]) -> Optional[str]:
+    """Pulls the state code out of a profile location such as "VIC" or "CA, 90210"."""
+    if not location:
+        return None
+    return str(location).split(",")[0].strip().upper() or None
+
+
+class CatalogIndex:
+    """TF-IDF index over hashed n-grams of the catalog, queried with NumPy cosine similarity."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: List[dict] = []
+        self._locations = np.empty(0, dtype=object)
+        self._matrix = np.zeros((0, HASH_DIM), dtype=np.float32)
+        self._idf = np.zeros(HASH_DIM, dtype=np.float32)
+        self.version = None
+
+    def rebuild(self, catalog):
+        """Re-indexes every loaded catalog collection; used as a catalog subscriber."""
+        entries = []
+        for kind in TEXT_FIELDS:
+            for doc in catalog.get(kind) or []:
+                entries.append({"kind": kind, "doc": doc, "text": _entry_text(kind, doc)})
+
+        counts = np.stack([_term_counts(e["text"]) for e in entries]) if entries else np.zeros((0, HASH_DIM), dtype=np.float32)
+        doc_freq = np.count_nonzero(counts, axis=0)
+        idf = (np.log((1 + len(entries)) / (1 + doc_freq)) + 1).astype(np.float32)
+        # Features that appear nowhere in the catalog get no weight; otherwise unknown query
+        # words would dominate the query norm and push every real match under MIN_SCORE
+        idf *= doc_freq > 0
+        matrix = counts * idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        locations = np.array([str(e["doc"].get("location", "")).upper() for e in entries], dtype=object)
+
+        with self._lock:
+            self._entries, self._matrix, self._idf, self._locations = entries, matrix, idf, locations
+            self.version = catalog.version
+        logger.info(f"Catalog index rebuilt with {len(entries)} entries (catalog v{catalog.version}).")
+
+    def search(self, query: str, state: Optional[str] = None, k: int = TOP_K) -> List[dict]:
+        """
+        Returns up to k entries most similar to the query, restricted to the
+        user's state and national ("AUS") entries when a state is known.
+        """
+        with self._lock:
+            entries, matrix, idf, locations = self._entries, self._matrix, self._idf, self._locations
+        if not entries:
+            return []
+
+        vector = _term_counts(query) * idf
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return []
+        scores = matrix @ (vector / norm)
+        if state:
+            scores = np.where((locations == state) | (locations == "AUS"), scores, -1.0)
+
+        k = min(k, len(entries))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {"kind": entries[i]["kind"], "score": float(scores[i]), "doc": entries[i]["doc"]}
+            for i in top if scores[i] >= MIN_SCORE
+        ]
+
+
+def format_entries(results: List[dict]) -> str:
+    """Renders search results as short prompt lines."""
+    lines = []
+    for result in results:
+        doc = result["doc"]
+        name = doc.get("name") or doc.get("title") or doc.get("id")
+        if result["kind"] == "rebates":
+            line = f"- Rebate: {name} ({doc.get('location')})"
+            if doc.get("amount") is not None:
+                line += f", up to ${doc['amount']}"
+            if doc.get("description"):
+                line += f": {doc['description']}"
+        else:
+            services = ", ".join(doc.get("services") or [])
+            line = f"- Contractor: {name} ({doc.get('location')}), services: {services}"
+            contact = doc.get("contact") or doc.get("contact_email") or doc.get("website")
+            if contact:
+                line += f", contact: {contact}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+index = CatalogIndex()
@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+import sys
+from pathlib import Path
+
+# Let tests import the app's packages (services, routes, ...) the same way main.py does
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,39 @@
+# backend/tests/fake_gemini.py
+"""Local stand-in for the Gemini model, for exercising services/gemini.py without network access."""
+import asyncio
+from dataclasses import dataclass
+from typing import List, Optional
+from google.api_core import exceptions as google_exceptions
+
+
+@dataclass
+class FakeResponse:
+    text: str
+
+
+class FakeModel:
+    """
+    Mimics GenerativeModel.generate_content_async with injectable latency and errors.
+
+    `latencies` and `errors` script calls one by one (call N uses entry N); once a
+    script runs out, the defaults apply. Set `healthy = False` to make every call fail.
+    """
+
+    def __init__(self, latency: float = 0.01, latencies: Optional[List[float]] = None,
+                 errors: Optional[List[Optional[Exception]]] = None):
+        self.latency = latency
+        self.latencies = list(latencies or [])
+        self.errors = list(errors or [])
+        self.healthy = True
+        self.calls = 0
+
+    async def generate_content_async(self, prompt: str):
+        call = self.calls
+        self.calls += 1
+        await asyncio.sleep(self.latencies[call] if call < len(self.latencies) else self.latency)
+        error = self.errors[call] if call < len(self.errors) else None
+        if error is None and not self.healthy:
+            error = google_exceptions.ServiceUnavailable("fake upstream failure")
+        if error is not None:
+            raise error
+        return FakeResponse(text=f"echo: {prompt} #{call}")
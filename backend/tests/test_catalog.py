@@ -0,0 +1,59 @@
+# backend/tests/test_catalog.py
+import datetime
+from fastapi.encoders import jsonable_encoder
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from google.cloud.firestore_v1 import GeoPoint
+from services.catalog import Catalog, _normalize, decode_snapshot, encode_snapshot
+
+# Shaped like a Firestore document as returned by doc.to_dict()
+RAW_DOC = {
+    "id": "federal_sres",
+    "name": "Small-scale Renewable Energy Scheme (SRES)",
+    "amount": 4000,
+    "location": "AUS",
+    "updated_at": DatetimeWithNanoseconds(2025, 1, 1, tzinfo=datetime.timezone.utc),
+    "office": GeoPoint(-35.28, 149.13),
+}
+
+
+def test_cached_documents_match_fastapi_encoding():
+    # The Firestore query path returns raw documents that FastAPI encodes with jsonable_encoder
+    expected = jsonable_encoder([RAW_DOC])
+    cached = _normalize([RAW_DOC])
+
+    assert cached == expected
+    assert cached[0]["updated_at"] == "2025-01-01T00:00:00+00:00"
+    assert cached[0]["office"] == {"latitude": -35.28, "longitude": 149.13}
+
+
+def test_snapshot_round_trip_preserves_encoding():
+    docs = _normalize([RAW_DOC])
+    snapshot = decode_snapshot(encode_snapshot({"rebates": docs, "contractors": []}, version=7))
+
+    assert snapshot["version"] == 7
+    assert snapshot["collections"]["rebates"] == docs
+
+
+def test_snapshot_written_on_change_is_loaded_on_warm_start(tmp_path):
+    path = tmp_path / "catalog.snapshot"
+    catalog = Catalog(path)
+    catalog.replace("rebates", _normalize([RAW_DOC]))
+    catalog.replace("contractors", [])
+
+    warm = Catalog(path)
+    assert warm.load_snapshot()
+    assert warm.get("rebates") == catalog.get("rebates")
+    assert warm.version == catalog.version
+
+
+def test_corrupt_snapshot_is_discarded(tmp_path):
+    path = tmp_path / "catalog.snapshot"
+    catalog = Catalog(path)
+    catalog.replace("rebates", [{"id": "a"}])
+    catalog.replace("contractors", [])
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    assert not Catalog(path).load_snapshot()
+    assert not path.exists()
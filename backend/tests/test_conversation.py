@@ -0,0 +1,68 @@
+# backend/tests/test_conversation.py
+import asyncio
+import threading
+import services.conversation as conversation_module
+from services.conversation import Conversation, ConversationStore, estimate_tokens
+
+FIRESTORE_COPY = {"summary": "", "turns": [{"user": "old q", "advisor": "old a", "timestamp": 0}]}
+
+
+def test_render_keeps_newest_turn_when_over_budget():
+    conversation = Conversation()
+    for i in range(10):
+        conversation.add_turn(f"question {i}", "reply " * 600)
+
+    rendered = conversation.render(token_budget=800)
+    assert "question 9" in rendered
+    assert estimate_tokens(rendered) <= 800
+
+
+def test_reload_after_eviction_prefers_pending_write(monkeypatch):
+    committed = []
+    monkeypatch.setattr(conversation_module, "_commit_batch", committed.extend)
+
+    async def run():
+        store = ConversationStore(max_users=1)
+        conversation = store.load("a", FIRESTORE_COPY)
+        store.record_turn("a", conversation, "new q", "new a")
+        store.load("b", None)  # evicts "a" while its write is still queued
+        assert store.get("a") is None
+
+        # Firestore still has the old copy; the queued version must win
+        reloaded = store.load("a", FIRESTORE_COPY)
+        assert [t["user"] for t in reloaded.turns] == ["old q", "new q"]
+
+        store.record_turn("a", reloaded, "third q", "third a")
+        await store.writer.stop()
+
+    asyncio.run(run())
+    saved = dict(committed)["a"]
+    assert [t["user"] for t in saved["turns"]] == ["old q", "new q", "third q"]
+
+
+def test_reload_during_commit_prefers_in_flight_write(monkeypatch):
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_commit(items):
+        started.set()
+        release.wait(timeout=5)
+
+    monkeypatch.setattr(conversation_module, "_commit_batch", slow_commit)
+
+    async def run():
+        store = ConversationStore(max_users=1)
+        conversation = store.load("a", FIRESTORE_COPY)
+        store.record_turn("a", conversation, "new q", "new a")
+        store.load("b", None)
+
+        flush = asyncio.ensure_future(store.writer.flush())
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+
+        reloaded = store.load("a", FIRESTORE_COPY)
+        assert [t["user"] for t in reloaded.turns] == ["old q", "new q"]
+
+        release.set()
+        await flush
+
+    asyncio.run(run())
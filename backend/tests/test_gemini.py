@@ -0,0 +1,133 @@
+# backend/tests/test_gemini.py
+import asyncio
+import time
+import pytest
+from google.api_core import exceptions as google_exceptions
+from services.gemini import CircuitBreaker, CircuitOpenError, GeminiClient, GeminiTimeoutError
+from tests.fake_gemini import FakeModel
+
+
+def _client(model, **kwargs):
+    kwargs.setdefault("hedge", False)
+    kwargs.setdefault("backoff_base", 0.01)
+    kwargs.setdefault("backoff_max", 0.02)
+    return GeminiClient(model, **kwargs)
+
+
+def test_retry_succeeds_after_transient_error():
+    model = FakeModel(errors=[google_exceptions.ServiceUnavailable("blip"), None])
+    client = _client(model, max_attempts=3)
+
+    assert asyncio.run(client.generate("hi")) == "echo: hi #1"
+    assert model.calls == 2
+    assert client.stats()["retries"] == 1
+    assert client.breaker.state == "closed"
+
+
+def test_non_retryable_error_is_not_retried():
+    model = FakeModel(errors=[google_exceptions.InvalidArgument("bad prompt")])
+    client = _client(model, max_attempts=3)
+
+    with pytest.raises(google_exceptions.InvalidArgument):
+        asyncio.run(client.generate("hi"))
+    assert model.calls == 1
+    assert client.breaker.failures == 0
+
+
+def test_deadline_raises_timeout():
+    client = _client(FakeModel(latency=5.0), timeout=0.1)
+
+    started = time.monotonic()
+    with pytest.raises(GeminiTimeoutError):
+        asyncio.run(client.generate("hi"))
+    assert time.monotonic() - started < 1.0
+
+
+def test_breaker_opens_and_short_circuits_without_calling_model():
+    model = FakeModel()
+    model.healthy = False
+    client = _client(model, max_attempts=1, breaker=CircuitBreaker(failure_threshold=2, reset_seconds=10))
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(google_exceptions.ServiceUnavailable):
+                await client.generate("hi")
+        with pytest.raises(CircuitOpenError):
+            await client.generate("hi")
+
+    asyncio.run(run())
+    assert model.calls == 2
+    assert client.breaker.state == "open"
+    assert client.stats()["short_circuited"] == 1
+
+
+def test_half_open_probe_closes_breaker():
+    model = FakeModel()
+    model.healthy = False
+    client = _client(model, max_attempts=1, breaker=CircuitBreaker(failure_threshold=2, reset_seconds=0.05))
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(google_exceptions.ServiceUnavailable):
+                await client.generate("hi")
+        model.healthy = True
+        await asyncio.sleep(0.06)
+        return await client.generate("hi")
+
+    assert asyncio.run(run()) == "echo: hi #2"
+    assert client.breaker.state == "closed"
+    assert client.breaker.failures == 0
+
+
+def test_failed_half_open_probe_reopens_breaker():
+    model = FakeModel()
+    model.healthy = False
+    client = _client(model, max_attempts=1, breaker=CircuitBreaker(failure_threshold=1, reset_seconds=0.05))
+
+    async def run():
+        with pytest.raises(google_exceptions.ServiceUnavailable):
+            await client.generate("hi")
+        await asyncio.sleep(0.06)
+        with pytest.raises(google_exceptions.ServiceUnavailable):
+            await client.generate("hi")  # the probe
+        with pytest.raises(CircuitOpenError):
+            await client.generate("hi")
+
+    asyncio.run(run())
+    assert model.calls == 2
+
+
+def test_hedged_request_wins_over_slow_primary():
+    warmup = 5
+    # Warm-up calls are fast; the next primary hangs and its hedge returns quickly
+    model = FakeModel(latency=0.01, latencies=[0.01] * warmup + [2.0, 0.01])
+    client = _client(model, hedge=True, hedge_min_samples=warmup, timeout=5.0)
+
+    async def run():
+        for _ in range(warmup):
+            await client.generate("warm")
+        started = time.monotonic()
+        text = await client.generate("hi")
+        return text, time.monotonic() - started
+
+    text, elapsed = asyncio.run(run())
+    assert text == f"echo: hi #{warmup + 1}"
+    assert elapsed < 1.0
+    stats = client.stats()
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+def test_late_failures_do_not_extend_cool_down():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.1)
+    breaker.record_failure()
+    opened_at = breaker.opened_at
+
+    time.sleep(0.06)
+    # A call that started before the breaker opened fails now
+    breaker.record_failure()
+    assert breaker.opened_at == opened_at
+
+    time.sleep(0.05)
+    breaker.before_call()  # cool-down measured from the original opening has passed
+    assert breaker.state == "half_open"
@@ -0,0 +1,48 @@
+# backend/tests/test_retrieval.py
+from types import SimpleNamespace
+from services.retrieval import CatalogIndex
+
+# A slice of the seeded catalog (seed_rebates.py / seed_contractors.py)
+REBATES = [
+    {"id": "federal_sres", "name": "Small-scale Renewable Energy Scheme (SRES)",
+     "description": "STC subsidy for solar/wind/hydro/hot water, provided as a point-of-sale discount.",
+     "amount": 4000, "location": "AUS", "income_max": 300000},
+    {"id": "vic_solar_homes", "name": "Solar Homes Program",
+     "description": "$1,400 rebate for solar panels, with options for hot water and batteries.",
+     "amount": 1400, "location": "VIC", "income_max": 210000},
+    {"id": "nsw_gas_rebate", "name": "NSW Gas Rebate",
+     "description": "Annual rebate on gas bills for eligible households.",
+     "amount": 110, "location": "NSW", "income_max": 100000},
+]
+CONTRACTORS = [
+    {"id": "vic_solar_pros", "name": "Melbourne Solar & Battery",
+     "services": ["solar", "battery", "hot_water"], "location": "VIC"},
+    {"id": "nsw_insulation_kings", "name": "Sydney Insulation & Windows",
+     "services": ["insulation", "windows"], "location": "NSW"},
+    {"id": "aus_green_savers", "name": "Aussie Green Savers",
+     "services": ["energy_audit", "solar", "insulation"], "location": "AUS"},
+]
+
+
+def _index():
+    index = CatalogIndex()
+    catalog = {"rebates": REBATES, "contractors": CONTRACTORS}
+    index.rebuild(SimpleNamespace(version=1, get=catalog.get))
+    return index
+
+
+def test_unknown_query_words_do_not_hide_real_matches():
+    # "who", "can", "install" and "panels" never appear in the contractor entries
+    results = _index().search("who can install solar panels", state="NSW")
+    ids = [r["doc"]["id"] for r in results]
+    assert "aus_green_savers" in ids
+
+
+def test_results_are_limited_to_state_and_national_entries():
+    results = _index().search("solar rebate", state="NSW")
+    assert results
+    assert all(r["doc"]["location"] in ("NSW", "AUS") for r in results)
+
+
+def test_query_with_no_known_words_returns_nothing():
+    assert _index().search("quantum teleportation", state="VIC") == []
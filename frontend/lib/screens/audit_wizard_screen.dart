@@ -1,7 +1,8 @@
 // lib/screens/audit_wizard_screen.dart
+import 'dart:convert';
 import 'package:flutter/material.dart';
-import 'package:cloud_firestore/cloud_firestore.dart';
 import 'package:firebase_auth/firebase_auth.dart';
+import 'package:http/http.dart' as http;
 import 'home_screen.dart';
 
 // 1. TYPED MODEL CLASS instead of a Map
@@ -39,17 +40,25 @@ class _AuditWizardScreenState extends State<AuditWizardScreen> {
   // Use the new typed model for state
   final AuditAnswers _answers = AuditAnswers();
   bool _isLoading = false;
+  final String _baseUrl = 'https://veridian-api-1jzx.onrender.com';
 
   Future<void> _submitAudit() async {
     final user = FirebaseAuth.instance.currentUser;
     if (user == null) return;
     setState(() => _isLoading = true);
     try {
-      await FirebaseFirestore.instance.collection('audits').add({
-        'user_id': user.uid,
-        'answers': _answers.toMap(), // Use the toMap() method here
-        'timestamp': Timestamp.now(),
-      });
+      // The backend validates the audit and writes it to Firestore
+      final idToken = await user.getIdToken();
+      final response = await http.post(Uri.parse('$_baseUrl/audits/'),
+          headers: {'Content-Type': 'application/json', 'Authorization': 'Bearer $idToken'},
+          body: jsonEncode({
+            'user_id': user.uid,
+            'answers': _answers.toMap(), // Use the toMap() method here
+          }));
+      // 201 means the audit is already in Firestore, so the dashboard will find it
+      if (response.statusCode != 201) {
+        throw Exception('Failed to submit audit: ${response.body}');
+      }
       if (mounted) {
         ScaffoldMessenger.of(context).showSnackBar(
             const SnackBar(content: Text('Audit saved successfully!')));